@@ -10,32 +10,73 @@ Support: https://ko-fi.com/ai_dev_2024
 
 __version__ = "0.2.0"
 
+import atexit
 import signal
 import os
 import sys
 import subprocess
 import platform
 import json
-import webbrowser
+import itertools
+import functools
+import hashlib
+import uuid
+import codecs
+import re
+import shlex
 import argparse
 import time
-import urllib.request
-import urllib.error
+import threading
 from pathlib import Path
-from datetime import datetime
+from collections import OrderedDict, deque
+
+# Faster JSON for API payloads when orjson is installed; both return/accept bytes
+try:
+    import orjson
+    jdumps = orjson.dumps
+    jloads = orjson.loads
+except ImportError:
+    def jdumps(obj) -> bytes:
+        return json.dumps(obj).encode('utf-8')
+    jloads = json.loads
+
+# ANSI styles
+BOLD = "\033[1m"
+RED = "\033[31m"
+GREEN = "\033[32m"
+YELLOW = "\033[33m"
+CYAN = "\033[36m"
+GRAY = "\033[90m"
+RESET = "\033[0m"
+
+# Plain text when output is piped or NO_COLOR is set (https://no-color.org)
+if not sys.stdout.isatty() or os.environ.get("NO_COLOR"):
+    BOLD = RED = GREEN = YELLOW = CYAN = GRAY = RESET = ""
+
+# Fixed parts of the REPL prompt
+_PROMPT_PREFIX = GREEN
+_PROMPT_SUFFIX = f"{RESET} > "
+# Transient "thinking" indicator and the padding that erases it (end="\r")
+_THINKING = f"{GRAY}⏳ thinking...{RESET}"
+_CLEAR = " " * 20
 
 # Session stats
-session_start = datetime.now()
+session_start = time.monotonic()
 commands_run = 0
 
-# Cross-platform readline support
-if platform.system() == "Windows":
-    try:
-        import pyreadline3 as readline
-    except ImportError:
-        readline = None
-else:
-    import readline
+# Cross-platform readline support, imported by _ensure_readline() for the REPL only
+readline = None
+
+def _ensure_readline():
+    """Import readline (pyreadline3 on Windows) for line editing in the REPL."""
+    global readline
+    if IS_WINDOWS:
+        try:
+            import pyreadline3 as readline
+        except ImportError:
+            readline = None
+    else:
+        import readline
 
 def get_platform_info():
     """Get current platform details."""
@@ -63,219 +104,549 @@ def get_platform_info():
         }
 
 PLATFORM = get_platform_info()
+IS_WINDOWS = PLATFORM["name"] == "Windows"
+
+_ENV_RE = re.compile(r'\$env:(\w+)')
+
+def _normalize_cd(path: str) -> str:
+    """Expand ~ in a cd target and, on Windows, $env: variables and separators.
+
+    Each step is guarded so the common plain-name case allocates nothing.
+    """
+    if "~" in path:
+        path = os.path.expanduser(path)
+    if IS_WINDOWS:
+        if "/" in path:
+            path = os.path.normpath(path)
+        if "$env:" in path:
+            path = os.path.expandvars(_ENV_RE.sub(r'%\1%', path))
+    return path
+
+# Working directory as of the last change_directory(); saves a getcwd() per turn
+_cwd = os.getcwd()
+# REPL prompt for _cwd (full path like the default Windows terminal)
+_prompt = _PROMPT_PREFIX + _cwd + _PROMPT_SUFFIX
+
+def change_directory(path):
+    """chdir and remember the resulting working directory and its prompt."""
+    global _cwd, _prompt
+    os.chdir(path)
+    _cwd = os.getcwd()
+    _prompt = _PROMPT_PREFIX + _cwd + _PROMPT_SUFFIX
+
+UPDATE_CHECK_INTERVAL = 24 * 60 * 60  # seconds between GitHub release checks
+_update_notice = None  # set by check_for_updates(), printed before the next prompt
 
 def check_for_updates():
-    """Check GitHub for new version (silent, non-blocking)."""
+    """Check GitHub for new version (silent, meant to run on a background thread).
+
+    The result is remembered in update_check.json so GitHub is asked at most
+    once per UPDATE_CHECK_INTERVAL.
+    """
+    global _update_notice
     try:
-        url = "https://api.github.com/repos/ai-dev-2024/OpenSH/releases/latest"
-        req = urllib.request.Request(url, headers={"User-Agent": "OpenSH"})
-        with urllib.request.urlopen(req, timeout=3) as response:
-            data = json.loads(response.read().decode('utf-8'))
+        try:
+            with open(update_check_path) as f:
+                state = json.load(f)
+        except (FileNotFoundError, ValueError):
+            state = {}
+        latest = state.get("latest", "")
+        if time.time() - state.get("checked", 0) >= UPDATE_CHECK_INTERVAL:
+            import urllib.request
+            url = "https://api.github.com/repos/ai-dev-2024/OpenSH/releases/latest"
+            req = urllib.request.Request(url, headers={"User-Agent": "OpenSH"})
+            with urllib.request.urlopen(req, timeout=3) as response:
+                data = jloads(response.read())
             latest = data.get("tag_name", "").lstrip("v")
-            if latest and latest != __version__:
-                print(f"\033[33m📦 New version available: v{latest} (you have v{__version__})\033[0m")
-                print(f"\033[90m   Update: https://github.com/ai-dev-2024/OpenSH/releases/tag/v{latest}\033[0m\n")
+            with open(update_check_path, "w") as f:
+                json.dump({"checked": time.time(), "latest": latest}, f)
+        if latest and latest != __version__:
+            _update_notice = (
+                f"{YELLOW}📦 New version available: v{latest} (you have v{__version__}){RESET}\n"
+                f"{GRAY}   Update: https://github.com/ai-dev-2024/OpenSH/releases/tag/v{latest}{RESET}\n"
+            )
     except:
         pass  # Silently fail - don't block startup
 
+def show_update_notice():
+    """Print the update notice once, if the background check found one."""
+    global _update_notice
+    if _update_notice:
+        print(_update_notice)
+        _update_notice = None
+
 def exit_handler(sig, frame):
     print()
     raise InterruptedError()
 
 # Signal handling differs on Windows
-if platform.system() != "Windows":
+if not IS_WINDOWS:
     signal.signal(signal.SIGINT, exit_handler)
 
 script_dir = Path(__file__).parent.absolute()
 env_path = script_dir / ".env"
 config_path = script_dir / "config.json"
+cache_path = script_dir / "cache.json"
+update_check_path = script_dir / "update_check.json"
+
+# Parsed config.json, read once and kept in sync by save_config()
+_config_cache = None
 
 def load_config():
-    """Load configuration from JSON file."""
-    if config_path.exists():
-        with open(config_path) as f:
-            return json.load(f)
-    return {}
+    """Load configuration from JSON file (cached after the first read)."""
+    global _config_cache
+    if _config_cache is None:
+        try:
+            with open(config_path) as f:
+                _config_cache = json.load(f)
+        except FileNotFoundError:
+            _config_cache = {}
+    return _config_cache
+
+def _write_if_changed(path: Path, data: bytes, mode: int = 0o666):
+    """Atomically replace `path` with `data`, skipping the write if it is unchanged.
+
+    An existing file keeps its permissions; a new one is created with `mode`
+    (less the umask).
+    """
+    try:
+        if path.read_bytes() == data:
+            return
+    except OSError:
+        pass
+    try:
+        existing_mode = path.stat().st_mode & 0o7777
+    except OSError:
+        existing_mode = None
+    tmp = path.with_name(path.name + ".tmp")
+    try:
+        tmp.unlink()  # A leftover temp file would keep its own, possibly looser, mode
+    except FileNotFoundError:
+        pass
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600 if existing_mode is not None else mode)
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    if existing_mode is not None:
+        os.chmod(tmp, existing_mode)
+    os.replace(tmp, path)
 
 def save_config(config: dict):
     """Save configuration to JSON file."""
-    with open(config_path, "w") as f:
-        json.dump(config, f, indent=2)
+    global _config_cache
+    _write_if_changed(config_path, json.dumps(config, indent=2).encode('utf-8'))
+    _config_cache = config
+
+def invalidate_config_cache():
+    """Force the next load_config() to re-read config.json from disk."""
+    global _config_cache
+    _config_cache = None
+
+# KEY=value lines of a .env file; comments and blank lines never match
+_ENV_LINE_RE = re.compile(r"^[ \t]*([A-Za-z_][A-Za-z0-9_]*)=(.*?)[ \t\r]*$", re.MULTILINE)
+
+def _read_env_file() -> dict:
+    """Parse .env in one read and one regex scan; returns {} if the file does not exist."""
+    try:
+        data = env_path.read_text()
+    except FileNotFoundError:
+        return {}
+    return dict(_ENV_LINE_RE.findall(data))
+
+# Key/value pairs from .env, kept in sync by save_api_key(); None until loaded
+_env_vars = None
 
 def load_env():
-    if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ[key] = value
+    """Load .env into os.environ once; later calls are no-ops."""
+    global _env_vars
+    if _env_vars is None:
+        _env_vars = _read_env_file()
+        os.environ.update(_env_vars)
 
 def save_api_key(provider: str, api_key: str):
-    """Save API key to .env file."""
-    env_vars = {}
-    if env_path.exists():
-        with open(env_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    env_vars[key] = value
-    
-    if provider == "groq":
-        env_vars["GROQ_API_KEY"] = api_key
-    else:
-        env_vars["GEMINI_API_KEY"] = api_key
-    
-    with open(env_path, "w") as f:
-        for key, value in env_vars.items():
-            f.write(f"{key}={value}\n")
+    """Save API key to .env file and the current environment."""
+    load_env()
+    key = "GROQ_API_KEY" if provider == "groq" else "GEMINI_API_KEY"
+    _env_vars[key] = api_key
+    os.environ[key] = api_key
+
+    data = "".join(f"{k}={v}\n" for k, v in _env_vars.items())
+    _write_if_changed(env_path, data.encode('utf-8'), mode=0o600)
 
 def setup_authentication():
     """Interactive authentication setup."""
-    print("\n\033[1m🔐 OpenSH Setup\033[0m\n")
+    import webbrowser
+    print(f"\n{BOLD}🔐 OpenSH Setup{RESET}\n")
     print("Choose your AI provider:\n")
-    print("  \033[36m1. Groq\033[0m (Recommended - Fast, reliable, 30 req/min)")
-    print("  \033[90m2. Gemini\033[0m (Google AI - 15 req/min)")
+    print(f"  {CYAN}1. Groq{RESET} (Recommended - Fast, reliable, 30 req/min)")
+    print(f"  {GRAY}2. Gemini{RESET} (Google AI - 15 req/min)")
     print()
-    
-    choice = input("\033[33mSelect provider [1/2]:\033[0m ").strip()
-    
+
+    choice = input(f"{YELLOW}Select provider [1/2]:{RESET} ").strip()
+
     if choice == "2":
         provider = "gemini"
-        print("\n\033[36m→ Get your free key at: https://aistudio.google.com/apikey\033[0m")
-        print("\033[90m  (Takes ~30 seconds - just click 'Create API Key')\033[0m\n")
-        open_browser = input("\033[33mOpen in browser? [Y/n]:\033[0m ").strip().lower()
+        print(f"\n{CYAN}→ Get your free key at: https://aistudio.google.com/apikey{RESET}")
+        print(f"{GRAY}  (Takes ~30 seconds - just click 'Create API Key'){RESET}\n")
+        open_browser = input(f"{YELLOW}Open in browser? [Y/n]:{RESET} ").strip().lower()
         if open_browser != 'n':
             webbrowser.open("https://aistudio.google.com/apikey")
-            print("\n\033[90mBrowser opened. Copy your API key and paste it below.\033[0m\n")
+            print(f"\n{GRAY}Browser opened. Copy your API key and paste it below.{RESET}\n")
     else:
         provider = "groq"
-        print("\n\033[36m→ Get your free key at: https://console.groq.com/keys\033[0m")
-        print("\033[90m  (Sign up with Google/GitHub, create API key)\033[0m\n")
-        open_browser = input("\033[33mOpen in browser? [Y/n]:\033[0m ").strip().lower()
+        print(f"\n{CYAN}→ Get your free key at: https://console.groq.com/keys{RESET}")
+        print(f"{GRAY}  (Sign up with Google/GitHub, create API key){RESET}\n")
+        open_browser = input(f"{YELLOW}Open in browser? [Y/n]:{RESET} ").strip().lower()
         if open_browser != 'n':
             webbrowser.open("https://console.groq.com/keys")
-            print("\n\033[90mBrowser opened. Copy your API key and paste it below.\033[0m\n")
-    
-    api_key = input(f"\033[33mPaste your {provider.title()} API key:\033[0m ").strip()
+            print(f"\n{GRAY}Browser opened. Copy your API key and paste it below.{RESET}\n")
+
+    api_key = input(f"{YELLOW}Paste your {provider.title()} API key:{RESET} ").strip()
     if not api_key:
         print("No API key provided.")
         return None
-    
+
     save_api_key(provider, api_key)
-    os.environ[f"{provider.upper()}_API_KEY"] = api_key
-    
+
     # Save config
     config = load_config()
     config["provider"] = provider
     config["auth_method"] = "api_key"
     save_config(config)
-    
-    print(f"\033[32m✓ {provider.title()} API key saved!\033[0m\n")
+
+    print(f"{GREEN}✓ {provider.title()} API key saved!{RESET}\n")
     return {"provider": provider, "api_key": api_key}
 
-def call_groq(prompt: str, api_key: str) -> str:
-    """Call Groq API directly using urllib (no external dependencies)."""
-    url = "https://api.groq.com/openai/v1/chat/completions"
-    
-    data = json.dumps({
-        "model": "llama-3.3-70b-versatile",
-        "messages": [{"role": "user", "content": prompt}],
-        "temperature": 0.1,
-        "max_tokens": 500
-    }).encode('utf-8')
-    
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-        "User-Agent": "OpenSH/0.2.0"
-    }
-    
-    req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-    
-    max_retries = 3
-    for attempt in range(max_retries):
+# Idle keep-alive HTTPS connections per API host as (connection, idle_since),
+# oldest first, reused across calls
+_connections = {}
+_connections_lock = threading.Lock()
+KEEPALIVE_EXPIRY = 60  # seconds idle before a connection is assumed dropped by the server
+MAX_IDLE_CONNECTIONS = 4  # per host
+
+# API host for each provider
+API_HOSTS = {"groq": "api.groq.com", "gemini": "generativelanguage.googleapis.com"}
+
+def _idle_connections(host: str) -> list:
+    """The idle pool for `host`, after closing expired connections (hold the lock)."""
+    idle = _connections.setdefault(host, [])
+    cutoff = time.monotonic() - KEEPALIVE_EXPIRY
+    while idle and idle[0][1] < cutoff:
+        idle.pop(0)[0].close()
+    return idle
+
+def _take_connection(host: str):
+    """The most recently used live idle connection to `host`, or None."""
+    with _connections_lock:
+        idle = _idle_connections(host)
+        return idle.pop()[0] if idle else None
+
+def _pool_connection(host: str, conn):
+    """Keep `conn` for reuse, or close it if the pool for `host` is full."""
+    with _connections_lock:
+        idle = _idle_connections(host)
+        if len(idle) < MAX_IDLE_CONNECTIONS:
+            idle.append((conn, time.monotonic()))
+            return
+    conn.close()
+
+def _new_connection(host: str, timeout: float):
+    """An HTTPS connection to `host`, tunnelled through HTTPS_PROXY if one is set."""
+    import http.client
+    import urllib.parse
+    import urllib.request
+    proxy = urllib.request.getproxies().get("https")
+    if not proxy or urllib.request.proxy_bypass(host):
+        return http.client.HTTPSConnection(host, timeout=timeout)
+    if "://" not in proxy:
+        proxy = "http://" + proxy
+    proxy = urllib.parse.urlsplit(proxy)
+    conn = http.client.HTTPSConnection(proxy.hostname, proxy.port or 80, timeout=timeout)
+    tunnel_headers = {}
+    if proxy.username:
+        import base64
+        credentials = f"{urllib.parse.unquote(proxy.username)}:{urllib.parse.unquote(proxy.password or '')}"
+        tunnel_headers["Proxy-Authorization"] = "Basic " + base64.b64encode(credentials.encode()).decode()
+    conn.set_tunnel(host, headers=tunnel_headers)
+    return conn
+
+def _send_request(host: str, path: str, body: bytes, headers: dict) -> tuple:
+    """POST on a pooled connection to `host`, returning (connection, response)."""
+    import http.client
+    conn = _take_connection(host)
+    if conn is not None:
         try:
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                return result["choices"][0]["message"]["content"].strip()
-        except urllib.error.HTTPError as e:
-            if e.code == 429:
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 2
-                    print(f"\033[90mRate limit - waiting {wait_time}s...\033[0m")
-                    time.sleep(wait_time)
-                    continue
-                raise Exception("Rate limit - please wait a moment")
-            else:
-                error_body = e.read().decode('utf-8') if e.fp else str(e)
-                raise Exception(f"API error {e.code}: {error_body[:100]}")
-        except urllib.error.URLError as e:
-            raise Exception(f"Network error: {e.reason}")
-
-def call_gemini(prompt: str, api_key: str) -> str:
-    """Call Gemini API directly using urllib."""
-    url = f"https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash:generateContent?key={api_key}"
-    
-    data = json.dumps({
-        "contents": [{"parts": [{"text": prompt}]}]
-    }).encode('utf-8')
-    
-    headers = {"Content-Type": "application/json", "User-Agent": "OpenSH/0.2.0"}
-    req = urllib.request.Request(url, data=data, headers=headers, method='POST')
-    
+            conn.request("POST", path, body=body, headers=headers)
+            return conn, conn.getresponse()
+        except (http.client.HTTPException, ConnectionError):
+            # The server dropped the idle keep-alive connection; reconnect
+            conn.close()
+    conn = _new_connection(host, timeout=30)
+    try:
+        conn.request("POST", path, body=body, headers=headers)
+        return conn, conn.getresponse()
+    except BaseException:
+        conn.close()
+        raise
+
+def _drain_connection(host: str, conn, response):
+    """Finish reading an abandoned response so its connection can be reused."""
+    import http.client
+    try:
+        response.read()
+    except (OSError, http.client.HTTPException):
+        conn.close()
+        return
+    _pool_connection(host, conn)
+
+def _release_connection(host: str, conn, response):
+    """Return a connection to the pool, draining any unread body in the background."""
+    if response.isclosed():
+        _pool_connection(host, conn)
+    else:
+        get_executor().submit(_drain_connection, host, conn, response)
+
+def prewarm_connection(host: str):
+    """Open a TLS connection to `host` ahead of the next request and pool it.
+
+    Does nothing if an idle connection is already pooled; failures are ignored
+    since the request will simply connect itself.
+    """
+    with _connections_lock:
+        if _idle_connections(host):
+            return
+    # Short connect timeout so a stalled prewarm can't hold up exiting the shell
+    conn = _new_connection(host, timeout=5)
+    try:
+        conn.connect()
+    except OSError:
+        conn.close()
+        return
+    conn.timeout = 30
+    conn.sock.settimeout(30)
+    _pool_connection(host, conn)
+
+def _close_connections():
+    """Close every pooled API connection (registered with atexit)."""
+    with _connections_lock:
+        for idle in _connections.values():
+            while idle:
+                idle.pop()[0].close()
+
+atexit.register(_close_connections)
+
+# Set on threads making speculative requests: they should fail fast and
+# silently rather than wait out rate limits or print over the input line
+_api_quiet = threading.local()
+
+def _api_post(host: str, path: str, payload: dict, headers: dict, parse):
+    """POST JSON to an API, retrying on rate limits; `parse` reads the response."""
+    body = jdumps(payload)
+    headers = {"Content-Type": "application/json", "User-Agent": "OpenSH/0.2.0", **headers}
+
     max_retries = 3
     for attempt in range(max_retries):
         try:
-            with urllib.request.urlopen(req, timeout=30) as response:
-                result = json.loads(response.read().decode('utf-8'))
-                return result["candidates"][0]["content"]["parts"][0]["text"].strip()
-        except urllib.error.HTTPError as e:
-            if e.code == 429:
-                if attempt < max_retries - 1:
-                    wait_time = (attempt + 1) * 2
-                    print(f"\033[90mRate limit - waiting {wait_time}s...\033[0m")
-                    time.sleep(wait_time)
-                    continue
-                raise Exception("Rate limit - please wait a moment")
-            else:
-                error_body = e.read().decode('utf-8') if e.fp else str(e)
-                raise Exception(f"API error {e.code}: {error_body[:100]}")
-        except urllib.error.URLError as e:
-            raise Exception(f"Network error: {e.reason}")
+            conn, response = _send_request(host, path, body, headers)
+        except OSError as e:
+            raise Exception(f"Network error: {e}")
+        try:
+            if response.status == 200:
+                result = parse(response)
+                _release_connection(host, conn, response)
+                return result
+            error_body = response.read().decode('utf-8', errors='replace')
+            _release_connection(host, conn, response)
+        except BaseException:
+            conn.close()
+            raise
+        if response.status == 429:
+            if attempt < max_retries - 1 and not getattr(_api_quiet, "active", False):
+                wait_time = (attempt + 1) * 2
+                print(f"{GRAY}Rate limit - waiting {wait_time}s...{RESET}")
+                time.sleep(wait_time)
+                continue
+            raise Exception("Rate limit - please wait a moment")
+        raise Exception(f"API error {response.status}: {error_body[:100]}")
+
+def _sse_events(response):
+    """Yield the JSON payload of each server-sent event until the stream ends."""
+    for raw in response:
+        line = raw.strip()
+        if not line.startswith(b"data: "):
+            continue
+        if line == b"data: [DONE]":
+            return
+        yield jloads(line[6:])
+
+def _command_line(text: str) -> tuple:
+    """(command line, whether it is complete) for a partial reply.
+
+    A leading ```lang fence line is skipped rather than taken as the command.
+    """
+    text = text.lstrip()
+    if text.startswith("```"):
+        if "\n" not in text:
+            return "", False
+        text = text.split("\n", 1)[1].lstrip()
+    line, newline, _ = text.partition("\n")
+    return line, bool(newline)
+
+# A command wrapped whole in inline-code backticks, e.g. `ls -la`
+_INLINE_CODE_RE = re.compile(r"(`+)([^`]+)\1")
+
+def _unwrap_backticks(line: str) -> str:
+    """Drop backticks wrapping the whole line, keeping `cmd` substitutions inside it."""
+    match = _INLINE_CODE_RE.fullmatch(line)
+    return match.group(2).strip() if match else line
+
+# Raised from the event stream when the token cap cut the reply short. In
+# single-line mode it only reaches the caller if the command line was not
+# complete yet, so a cut-off command is never run.
+_TRUNCATED = "AI reply was truncated - nothing was run"
+
+def _read_command_line(pieces, on_text=None) -> str:
+    """Consume streamed reply text until its first command line is complete.
+
+    The command's text is passed to `on_text` as it arrives.
+    """
+    text = ""
+    shown = 0
+    for piece in pieces:
+        text += piece
+        line, complete = _command_line(text)
+        if line.startswith("`"):
+            line = line.strip("`")  # Probably inline code; don't echo its backticks
+        if on_text and len(line) > shown:
+            on_text(line[shown:])
+            shown = len(line)
+        if complete:
+            break
+    return _unwrap_backticks(_command_line(text)[0].strip())
+
+def call_groq(prompt: str, api_key: str, on_text=None, system=None, single_line=True) -> str:
+    """Call Groq API directly over a pooled HTTPS connection (no external dependencies).
+
+    The reply is streamed; each piece of text is passed to `on_text` as it arrives.
+    `system`, if given, is sent as the system message. With `single_line` only
+    the first command line is read and passed on.
+    """
+    messages = [{"role": "user", "content": prompt}]
+    if system:
+        messages.insert(0, {"role": "system", "content": system})
+    payload = {
+        "model": "llama-3.3-70b-versatile",
+        "messages": messages,
+        # Deterministic output, so a repeated request gets the cached command
+        "temperature": 0,
+        "max_tokens": 64 if single_line else 500,
+        "stream": True
+    }
+
+    def deltas(response):
+        for chunk in _sse_events(response):
+            if chunk.get("choices"):
+                choice = chunk["choices"][0]
+                yield choice.get("delta", {}).get("content") or ""
+                if choice.get("finish_reason") == "length":
+                    raise Exception(_TRUNCATED)
+
+    def parse(response):
+        if single_line:
+            return _read_command_line(deltas(response), on_text)
+        pieces = []
+        for delta in deltas(response):
+            pieces.append(delta)
+            if on_text and delta:
+                on_text(delta)
+        return "".join(pieces).strip()
+
+    return _api_post(API_HOSTS["groq"], "/openai/v1/chat/completions", payload,
+                     {"Authorization": f"Bearer {api_key}"}, parse)
+
+def call_gemini(prompt: str, api_key: str, on_text=None, system=None, single_line=True) -> str:
+    """Call Gemini API over a pooled HTTPS connection, streaming until the first full line.
+
+    Text of that first line is passed to `on_text` as it arrives. `system`, if
+    given, is sent as the system instruction. With `single_line` off the whole
+    reply is read and returned.
+    """
+    path = f"/v1beta/models/gemini-2.0-flash:streamGenerateContent?alt=sse&key={api_key}"
+    payload = {
+        "contents": [{"parts": [{"text": prompt}]}],
+        # A single command line rarely needs more; caps the worst-case reply time
+        "generationConfig": {"maxOutputTokens": 64 if single_line else 500, "temperature": 0},
+    }
+    if system:
+        payload["systemInstruction"] = {"parts": [{"text": system}]}
+
+    def texts(response):
+        for chunk in _sse_events(response):
+            candidate = chunk["candidates"][0]
+            for part in candidate.get("content", {}).get("parts", []):
+                yield part.get("text", "")
+            if candidate.get("finishReason") == "MAX_TOKENS":
+                raise Exception(_TRUNCATED)
+
+    def parse(response):
+        # The answer is a single command line, so stop reading the event
+        # stream as soon as the first line is complete
+        if single_line:
+            return _read_command_line(texts(response), on_text)
+        text = ""
+        for piece in texts(response):
+            text += piece
+            if on_text and piece:
+                on_text(piece)
+        return text.strip()
 
-def get_ai_response(prompt: str) -> str:
-    """Get AI response using configured provider."""
+    return _api_post(API_HOSTS["gemini"], path, payload, {}, parse)
+
+def get_ai_response(prompt: str, on_text=None, system=None, single_line=True) -> str:
+    """Get AI response using configured provider, streaming text to `on_text`.
+
+    With `single_line` off, replies are not cut at the first line (for batches).
+    """
     config = load_config()
     provider = config.get("provider", "groq")
-    
+
     if provider == "gemini":
         api_key = os.getenv("GEMINI_API_KEY")
         if not api_key:
             raise Exception("No Gemini API key - run !auth")
-        return call_gemini(prompt, api_key)
+        return call_gemini(prompt, api_key, on_text, system, single_line)
     else:
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise Exception("No Groq API key - run !auth")
-        return call_groq(prompt, api_key)
+        return call_groq(prompt, api_key, on_text, system, single_line)
+
+# Shared worker pool for overlapping blocking API calls
+_executor = None
+
+def get_executor():
+    """Return the process-wide worker pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        import concurrent.futures
+        _executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+    return _executor
 
 def show_help():
-    print("\033[36m!auth\033[0m      - Change API provider/key")
-    print("\033[36m!version\033[0m   - Show version info")
-    print("\033[36m!credits\033[0m   - Show credits")
-    print("\033[36m!uninstall\033[0m - Remove OpenSH")
-    print("\033[36m!help\033[0m      - Show this help")
-    print("\033[36m!<cmd>\033[0m     - Run command directly (bypass AI)")
-    print("\033[36mexit\033[0m       - Exit OpenSH")
-    print("\033[36mCtrl+C\033[0m     - Exit OpenSH")
+    print(f"{CYAN}!auth{RESET}       - Change API provider/key")
+    print(f"{CYAN}!version{RESET}    - Show version info")
+    print(f"{CYAN}!credits{RESET}    - Show credits")
+    print(f"{CYAN}!clearcache{RESET} - Forget cached AI commands")
+    print(f"{CYAN}!uninstall{RESET}  - Remove OpenSH")
+    print(f"{CYAN}!help{RESET}       - Show this help")
+    print(f"{CYAN}!<cmd>{RESET}      - Run command directly (bypass AI)")
+    print(f"{CYAN}exit{RESET}        - Exit OpenSH")
+    print(f"{CYAN}Ctrl+C{RESET}      - Exit OpenSH")
     print()
 
 def show_version():
     config = load_config()
     provider = config.get("provider", "not configured")
-    print(f"\n\033[1mOpenSH\033[0m v{__version__}")
+    print(f"\n{BOLD}OpenSH{RESET} v{__version__}")
     print(f"Platform: {PLATFORM['name']} ({PLATFORM['shell']})")
     print(f"Provider: {provider}")
     print(f"Python: {platform.python_version()}")
@@ -283,89 +654,106 @@ def show_version():
     print()
 
 def show_credits():
-    print("\n\033[36m─────────────────────────────────────────\033[0m")
-    print(f"\033[1mOpenSH\033[0m v{__version__} - Open Natural Language Shell")
-    print("Based on \033[36mnlsh\033[0m by Junaid Mahmood")
+    print(f"\n{CYAN}─────────────────────────────────────────{RESET}")
+    print(f"{BOLD}OpenSH{RESET} v{__version__} - Open Natural Language Shell")
+    print(f"Based on {CYAN}nlsh{RESET} by Junaid Mahmood")
     print("https://github.com/junaid-mahmood/nlsh")
-    print("\n☕ Support: \033[33mhttps://ko-fi.com/ai_dev_2024\033[0m")
-    print("\033[36m─────────────────────────────────────────\033[0m\n")
+    print(f"\n☕ Support: {YELLOW}https://ko-fi.com/ai_dev_2024{RESET}")
+    print(f"{CYAN}─────────────────────────────────────────{RESET}\n")
 
 def show_goodbye():
     global commands_run, session_start
-    duration = datetime.now() - session_start
-    minutes = int(duration.total_seconds() // 60)
-    seconds = int(duration.total_seconds() % 60)
-    print(f"\n\033[36m─────────────────────────────────────────\033[0m")
+    minutes, seconds = divmod(int(time.monotonic() - session_start), 60)
+    print(f"\n{CYAN}─────────────────────────────────────────{RESET}")
     print(f"Session: {minutes}m {seconds}s | Commands: {commands_run}")
-    print("\033[36mGoodbye! Thanks for using OpenSH ☕\033[0m")
-    print("\033[36m─────────────────────────────────────────\033[0m\n")
+    print(f"{CYAN}Goodbye! Thanks for using OpenSH ☕{RESET}")
+    print(f"{CYAN}─────────────────────────────────────────{RESET}\n")
 
 # Initialize
 load_env()
 
-command_history = []
 MAX_HISTORY = 10
-MAX_CONTEXT_CHARS = 4000
+command_history = deque(maxlen=MAX_HISTORY)
+HISTORY_OUTPUT_CHARS = 500  # output kept per command by the runners
+HISTORY_PREVIEW_CHARS = 80  # output shown to the AI per history entry
+_history_str_cache = None  # format_history() result, reset by add_to_history
 
-def get_context_size() -> int:
-    return sum(len(e["command"]) + len(e["output"]) for e in command_history)
+# Colour and cursor escape sequences in command output
+_ANSI_RE = re.compile(r"\x1b\[[0-9;?]*[A-Za-z]")
 
 def add_to_history(command: str, output: str = ""):
-    global commands_run
+    global commands_run, _history_str_cache
     commands_run += 1
-    command_history.append({
-        "command": command,
-        "output": output[:500] if output else ""
-    })
-    while len(command_history) > MAX_HISTORY:
-        command_history.pop(0)
-    while get_context_size() > MAX_CONTEXT_CHARS and len(command_history) > 1:
-        command_history.pop(0)
+    _history_str_cache = None
+    # The AI only needs the command and a hint of how it went: the first line
+    # of output, without escape codes, capped at HISTORY_PREVIEW_CHARS
+    preview = ""
+    if output:
+        preview = _ANSI_RE.sub("", output[:HISTORY_OUTPUT_CHARS]).strip().split("\n", 1)[0]
+        preview = preview.rstrip()[:HISTORY_PREVIEW_CHARS]
+    formatted = f"$ {command} -> {preview}" if preview else f"$ {command}"
+    command_history.append({"command": command, "formatted": formatted})
 
 def format_history() -> str:
+    global _history_str_cache
+    if _history_str_cache is not None:
+        return _history_str_cache
     if not command_history:
         return "No previous commands."
-    
-    lines = []
-    for i, entry in enumerate(command_history[-5:], 1):
-        lines.append(f"{i}. $ {entry['command']}")
-        if entry['output']:
-            output_lines = entry['output'].strip().split('\n')[:2]
-            for line in output_lines:
-                lines.append(f"   {line}")
-    return "\n".join(lines)
+
+    recent = itertools.islice(command_history, max(0, len(command_history) - 5), None)
+    _history_str_cache = "\n".join(f"{i}. {entry['formatted']}" for i, entry in enumerate(recent, 1))
+    return _history_str_cache
+
+LISTING_ENTRIES = 20  # directory entries shown to the AI per folder
+
+def _first_names(path: str, n: int) -> tuple:
+    """Names of the first `n` entries of a directory, without reading the rest."""
+    names = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            names.append(entry.name)
+            if len(names) >= n:
+                break
+    return tuple(names)
+
+@functools.lru_cache(maxsize=32)
+def _cached_listing(path: str, mtime_ns: int) -> tuple:
+    return _first_names(path, LISTING_ENTRIES)
+
+def list_directory(path) -> tuple:
+    """First LISTING_ENTRIES names in `path`, rescanned only when it changes."""
+    path = str(path)
+    return _cached_listing(path, os.stat(path).st_mtime_ns)
 
 def get_file_context(cwd: str) -> str:
     """Get current directory and desktop file listings for AI context."""
     context_parts = []
-    
+
     # Current directory listing (top 20 items)
     try:
-        items = os.listdir(cwd)[:20]
+        items = list_directory(cwd)
         if items:
             context_parts.append(f"Files in current directory ({cwd}):\n" + "\n".join(f"  {item}" for item in items))
     except:
         pass
-    
-    # Desktop listing if not already in desktop
+
+    # Desktop listing if not already in desktop (a missing Desktop fails the stat)
     desktop_path = Path.home() / "Desktop"
-    if desktop_path.exists() and str(desktop_path) != cwd:
+    if str(desktop_path) != cwd:
         try:
-            items = os.listdir(desktop_path)[:20]
+            items = list_directory(desktop_path)
             if items:
                 context_parts.append(f"Files on Desktop:\n" + "\n".join(f"  {item}" for item in items))
         except:
             pass
-    
+
     return "\n\n".join(context_parts) if context_parts else ""
 
-def get_command(user_input: str, cwd: str) -> str:
-    history_context = format_history()
-    file_context = get_file_context(cwd)
-    
-    # Platform-specific shell instructions
-    if PLATFORM["name"] == "Windows":
-        shell_instructions = """You are a shell command translator. Convert the user's request into a PowerShell command for Windows.
+def _build_shell_instructions(platform_info: dict) -> str:
+    """Platform-specific shell instructions for the prompt."""
+    if platform_info["name"] == "Windows":
+        return """You are a shell command translator. Convert the user's request into a PowerShell command for Windows.
 Use PowerShell cmdlets and syntax. Examples:
 - List files: Get-ChildItem or dir
 - Find files: Get-ChildItem -Recurse -Filter "*.py"
@@ -380,124 +768,790 @@ Use PowerShell cmdlets and syntax. Examples:
 - Kill process: Stop-Process -Name "name"
 - Network info: ipconfig, Test-NetConnection"""
     else:
-        shell_instructions = f"""You are a shell command translator. Convert the user's request into a shell command for {PLATFORM['shell']} on {PLATFORM['name']}."""
-    
-    prompt = f"""{shell_instructions}
-Current directory: {cwd}
+        return f"""You are a shell command translator. Convert the user's request into a shell command for {platform_info['shell']} on {platform_info['name']}."""
 
-AVAILABLE FILES/FOLDERS (use EXACT names with correct spelling and spacing):
-{file_context}
-
-Recent command history:
-{history_context}
+SHELL_INSTRUCTIONS = _build_shell_instructions(PLATFORM)
 
-CRITICAL RULES:
-- Output ONLY the command, nothing else
-- No explanations, no markdown, no backticks
-- IMPORTANT: Match user's description to the EXACT file/folder name from the listing above
+# Static instructions, sent as the system prompt so every request shares the
+# same prefix and the providers' prompt caching can reuse it
+_RULES = """- No explanations, no markdown, no backticks
+- IMPORTANT: Match user's description to the EXACT file/folder name from the AVAILABLE FILES/FOLDERS listing
 - For example, if user says "resume folder" and listing shows "Current Resume", use "Current Resume"
 - Paths with spaces must be quoted: "C:\\Users\\Name\\Desktop\\Folder Name"
 - If unclear, make a reasonable assumption
-- Use the command history for context
+- Use the command history for context"""
+
+SYSTEM_PROMPT = SHELL_INSTRUCTIONS + """
+
+CRITICAL RULES:
+- Output ONLY the command, nothing else
+""" + _RULES
+
+# For multi-step requests answered in one round-trip by get_commands_batch()
+BATCH_SYSTEM_PROMPT = SHELL_INSTRUCTIONS + """
+
+CRITICAL RULES:
+- The request has several steps: output ONLY a JSON array of commands, one string per step, e.g. ["mkdir build", "cd build"]
+""" + _RULES
+
+# Per-turn part of the prompt, sent as the user message
+PROMPT_TEMPLATE = """Current directory: {cwd}
+
+AVAILABLE FILES/FOLDERS (use EXACT names with correct spelling and spacing):
+{file_context}
+
+Recent command history:
+{history}
 
 User request: {user_input}"""
 
-    return get_ai_response(prompt)
+# Previously generated commands, most recently used last; loaded on first use
+_command_cache = None
+_command_cache_lock = threading.Lock()
+MAX_CACHE_ENTRIES = 128
+CACHE_TTL = 60 * 60  # seconds a cached command stays valid
+
+# Queries whose answer may change over time are never served from the cache
+_UNCACHEABLE_RE = re.compile(r"\b(now|today|tonight|yesterday|latest|recent(ly)?)\b", re.IGNORECASE)
+
+def _listing_signature(cwd: str) -> str:
+    """Stable digest of the cwd listing, so cached commands expire when files change."""
+    try:
+        names = list_directory(cwd)
+    except OSError:
+        names = ()
+    return hashlib.blake2b("\0".join(names).encode('utf-8'), digest_size=8).hexdigest()
+
+# Polite phrasings of the same request should share a cache entry, but the cached
+# command runs automatically, so only words that never change its meaning are
+# dropped; case, file names and every other word are kept as typed
+_QUERY_POLITE_WORDS = frozenset({"please", "pls", "kindly", "me"})
+_QUERY_POLITE_PREFIX_RE = re.compile(r"^(?:can|could|would|will)\s+you\s+", re.IGNORECASE)
+
+def _normalize_query(user_input: str) -> str:
+    """Drop politeness from a request, e.g. "Can you please show me Notes.txt?" -> "show Notes.txt"."""
+    text = _QUERY_POLITE_PREFIX_RE.sub("", user_input.strip()).rstrip("?! ")
+    words = [w for w in text.split() if w.lower() not in _QUERY_POLITE_WORDS]
+    return " ".join(words) or " ".join(user_input.split())
+
+def _command_cache_key(user_input: str, cwd: str, history_context: str, kind: str = "command") -> str:
+    """Fixed-size digest of everything the generated command depends on."""
+    query = _normalize_query(user_input)
+    parts = (kind, PLATFORM["name"], cwd, _listing_signature(cwd), query, history_context)
+    return hashlib.blake2b("\x1f".join(parts).encode('utf-8'), digest_size=16).hexdigest()
+
+def _is_cache_entry(entry) -> bool:
+    """Whether `entry` from cache.json is a [key, [command, timestamp]] pair."""
+    return (isinstance(entry, list) and len(entry) == 2 and isinstance(entry[0], str)
+            and isinstance(entry[1], list) and len(entry[1]) == 2
+            and isinstance(entry[1][0], str) and isinstance(entry[1][1], (int, float)))
+
+def _load_command_cache() -> OrderedDict:
+    """Read cache.json as key -> [command, timestamp], dropping expired entries."""
+    global _command_cache
+    if _command_cache is None:
+        try:
+            with open(cache_path) as f:
+                entries = json.load(f)
+        except (OSError, ValueError):
+            entries = []
+        if not isinstance(entries, list):
+            entries = []  # Valid JSON but not ours; start afresh
+        cutoff = time.time() - CACHE_TTL
+        _command_cache = OrderedDict(
+            (key, value) for key, value in filter(_is_cache_entry, entries)
+            if value[1] >= cutoff
+        )
+    return _command_cache
+
+def get_cached_command(key: str):
+    """Return the cached command for `key`, or None if absent or expired."""
+    with _command_cache_lock:
+        cache = _load_command_cache()
+        entry = cache.get(key)
+        if entry is None:
+            return None
+        if time.time() - entry[1] > CACHE_TTL:
+            del cache[key]
+            return None
+        cache.move_to_end(key)
+        return entry[0]
+
+def cache_command(key: str, command: str):
+    """Remember a generated command and persist the cache to disk."""
+    with _command_cache_lock:
+        cache = _load_command_cache()
+        cache[key] = [command, time.time()]
+        cache.move_to_end(key)
+        while len(cache) > MAX_CACHE_ENTRIES:
+            cache.popitem(last=False)
+        try:
+            _write_if_changed(cache_path, json.dumps(list(cache.items())).encode('utf-8'))
+        except OSError:
+            pass  # The cache is an optimization; never fail a command over it
+
+# This session's request -> command translations, keyed on (cwd, request) only,
+# so repeating a request (arrow-up) replays it even after the history moved on
+_recent_commands = OrderedDict()
+MAX_RECENT_COMMANDS = 32
+
+def recall_command(user_input: str, cwd: str):
+    """The command this session already generated for `user_input` in `cwd`, or None."""
+    key = (cwd, user_input.strip())
+    command = _recent_commands.get(key)
+    if command is not None:
+        _recent_commands.move_to_end(key)
+    return command
+
+def remember_command(user_input: str, cwd: str, command: str):
+    if not command or _UNCACHEABLE_RE.search(user_input):
+        return
+    # Case is kept: "show Notes.txt" and "show notes.txt" name different files
+    _recent_commands[(cwd, user_input.strip())] = command
+    while len(_recent_commands) > MAX_RECENT_COMMANDS:
+        _recent_commands.popitem(last=False)
+
+def clear_command_cache():
+    """Forget every cached command, in memory and on disk."""
+    global _command_cache
+    _recent_commands.clear()
+    with _command_cache_lock:
+        _command_cache = OrderedDict()
+        try:
+            os.remove(cache_path)
+        except FileNotFoundError:
+            pass
+
+_FENCE_LANGUAGES = frozenset({"bash", "sh", "shell", "zsh", "console", "powershell", "pwsh", "ps1", "cmd", "bat"})
+
+def get_command(user_input: str, cwd: str, on_text=None) -> str:
+    """Translate a request into a command; `on_text` sees the reply as it streams."""
+    history_context = format_history()
+    cache_key = None
+    if not _UNCACHEABLE_RE.search(user_input):
+        cache_key = _command_cache_key(user_input, cwd, history_context)
+        command = get_cached_command(cache_key)
+        if command is not None:
+            return command
+    file_context = get_file_context(cwd)
+
+    prompt = PROMPT_TEMPLATE.format(cwd=cwd, file_context=file_context,
+                                    history=history_context, user_input=user_input)
+
+    command = get_ai_response(prompt, on_text, SYSTEM_PROMPT)
+    # An empty reply or a lone code-fence language name is not something to run
+    if not command or command.lower() in _FENCE_LANGUAGES:
+        raise Exception("AI did not return a command - nothing was run")
+    if command and cache_key:
+        cache_command(cache_key, command)
+    return command
+
+# Requests that describe several steps ("make a venv then install requests")
+_MULTI_STEP_RE = re.compile(r"\bthen\b|;|\n", re.IGNORECASE)
+
+def is_multi_step(user_input: str) -> bool:
+    return bool(_MULTI_STEP_RE.search(user_input))
+
+def _parse_command_list(reply: str) -> list:
+    """Commands from a JSON array reply; anything else is refused, never run as text."""
+    reply = reply.strip()
+    if reply.startswith("```"):
+        # Tolerate a ```json fence around the array, but nothing else
+        reply = reply[3:].rstrip("`").strip()
+        if reply.lower().startswith("json"):
+            reply = reply[4:]
+    try:
+        commands = jloads(reply)
+    except ValueError:
+        commands = None
+    if not isinstance(commands, list) or not all(isinstance(c, str) for c in commands):
+        raise Exception("AI did not return a command list - nothing was run")
+    return [c.strip() for c in commands if c.strip()]
+
+def get_commands_batch(user_input: str, cwd: str) -> list:
+    """Translate a multi-step request into a list of commands with a single API call."""
+    history_context = format_history()
+    cache_key = None
+    if not _UNCACHEABLE_RE.search(user_input):
+        cache_key = _command_cache_key(user_input, cwd, history_context, kind="batch")
+        cached = get_cached_command(cache_key)
+        if cached is not None:
+            return jloads(cached)
+    prompt = PROMPT_TEMPLATE.format(cwd=cwd, file_context=get_file_context(cwd),
+                                    history=history_context, user_input=user_input)
+    commands = _parse_command_list(get_ai_response(prompt, system=BATCH_SYSTEM_PROMPT, single_line=False))
+    if commands and cache_key:
+        cache_command(cache_key, json.dumps(commands))
+    return commands
+
+def get_command_steps(user_input: str, cwd: str) -> list:
+    """Commands for a request: one per step if it has several, else just one."""
+    if is_multi_step(user_input):
+        return get_commands_batch(user_input, cwd)
+    command = get_command(user_input, cwd)
+    return [command] if command else []
+
+def get_commands(queries: list, cwd: str) -> list:
+    """Translate several queries concurrently, returning all their commands in order."""
+    if len(queries) == 1:
+        return get_command_steps(queries[0], cwd)
+    steps = get_executor().map(lambda q: get_command_steps(q, cwd), queries)
+    return [command for commands in steps for command in commands]
+
+# Common shell commands that should run directly (per platform)
+if IS_WINDOWS:
+    shell_commands = [
+        "dir", "cls", "type", "copy", "move", "del", "md", "rd", 
+        "pwd", "ls", "cat", "clear", "whoami", "date", "time",
+        "ipconfig", "ping", "netstat", "nslookup", "tracert", "arp",
+        "tasklist", "taskkill", "systeminfo", "hostname", "ver",
+        "diskpart", "chkdsk", "format",
+        "tree", "fc", "comp", "more", "sort", "find", "findstr",
+        "attrib", "xcopy", "robocopy", "where", "set", "path",
+    ]
+    shell_starters = [
+        "cd ", "cd\\", "cd/", "dir ", "echo ", "type ", 
+        "copy ", "move ", "del ", "ren ", "rename ", "md ", "mkdir ",
+        "rd ", "rmdir ", "attrib ", "xcopy ", "robocopy ",
+        "Get-", "Set-", "New-", "Remove-", "Copy-", "Move-", "Out-",
+        "Write-", "Read-", "Start-", "Stop-", "Invoke-", "Test-",
+        "Select-", "Where-", "ForEach-", "Sort-", "Group-",
+        "git ", "npm ", "node ", "npx ", "yarn ", "pnpm ",
+        "python ", "python3 ", "py ", "pip ", "pip3 ",
+        "cargo ", "rustc ", "go ", "java ", "javac ",
+        "dotnet ", "nuget ",
+        "curl ", "wget ", "ssh ", "scp ", "docker ", "kubectl ",
+        "code ", "notepad ", "explorer ",
+        "./", ".\\", "/", "\\", "~", "$", ">", ">>", "|", "&&", ";",
+    ]
+else:
+    shell_commands = [
+        "ls", "pwd", "clear", "whoami", "date", "cal", "uptime",
+        "top", "htop", "ps", "kill", "killall", "jobs", "bg", "fg",
+        "cat", "head", "tail", "less", "more", "touch", "stat",
+        "find", "grep", "awk", "sed", "wc", "sort", "uniq", "diff",
+        "tar", "zip", "unzip", "gzip", "gunzip", "bzip2",
+        "chmod", "chown", "chgrp", "id", "groups", "passwd",
+        "df", "du", "free", "mount", "umount", 
+        "ping", "curl", "wget", "ssh", "scp", "netstat", "ifconfig", "ip",
+        "apt", "yum", "dnf", "pacman", "brew", "snap", "flatpak",
+        "man", "which", "whereis", "history", "alias", "source", "export",
+    ]
+    shell_starters = [
+        "cd ", "ls ", "ll ", 
+        "cat ", "head ", "tail ", "touch ", "rm ", "cp ", "mv ",
+        "mkdir ", "rmdir ", "chmod ", "chown ", "ln ",
+        "echo ", "grep ", "sed ", "awk ", "cut ", "tr ", "xargs ",
+        "git ", "npm ", "node ", "npx ", "yarn ", "pnpm ",
+        "python ", "python3 ", "pip ", "pip3 ",
+        "cargo ", "rustc ", "go ", "java ", "javac ",
+        "make ", "cmake ", "gcc ", "g++ ", "clang ",
+        "brew ", "apt ", "apt-get ", "yum ", "dnf ", "pacman ", "snap ",
+        "sudo ", "su ", "ssh ", "scp ", "curl ", "wget ",
+        "docker ", "kubectl ", "aws ", "gcloud ", "az ",
+        "vi ", "vim ", "nano ", "emacs ", "code ",
+        "open ", "xdg-open ",
+        "export ", "source ", "alias ",
+        "./", "/", "~", "$", ">", ">>", "|", "&&", ";",
+    ]
+
+# Users can teach the detector their own tools via config.json, e.g.
+# "shell_commands": ["lazygit"], "shell_starters": ["terraform "]
+# A malformed config.json must not stop the module loading (--version, !auth)
+try:
+    _user_config = load_config()
+except (OSError, ValueError):
+    _user_config = {}
+for _key, _words in (("shell_commands", shell_commands), ("shell_starters", shell_starters)):
+    _extra = _user_config.get(_key) if isinstance(_user_config, dict) else None
+    if isinstance(_extra, list):
+        _words.extend(w for w in _extra if isinstance(w, str) and w)
+
+EXIT_WORDS = frozenset({"exit", "quit", "bye", "goodbye"})
+
+# Built once at import: exact commands as a lowercased set, and every starter
+# folded into one anchored, case-insensitive regex (longest alternatives first)
+SHELL_COMMANDS_SET = frozenset(c.lower() for c in shell_commands)
+# Whole inputs that are never natural language, checked with one set lookup
+_NOT_NATURAL_WORDS = SHELL_COMMANDS_SET | EXIT_WORDS
+# Word starters ("git ") also match when followed by any other word boundary,
+# so "git", "git\tlog" or "ls|wc" count as shell, but "gitk" and "github" don't
+_STARTER_RE = re.compile(
+    "|".join(
+        re.escape(s.rstrip()) + r"(?:\s|$|[/\\~.$>|&;])" if s.endswith(" ") else re.escape(s)
+        for s in sorted(shell_starters, key=len, reverse=True)
+    ),
+    re.IGNORECASE
+)
+
+_SHELL_SYMBOLS = frozenset("|&;<>")
 
 def is_natural_language(text: str) -> bool:
     if text.startswith("!"):
         return False
-    
-    # Exit commands
-    if text.lower() in ["exit", "quit", "bye", "goodbye"]:
+
+    # Lines opening with a shell operator (| x, && y, > file) are shell; paths
+    # and variables (./x, ~/x, $VAR) are caught by _STARTER_RE below
+    if text[:1] in _SHELL_SYMBOLS:
         return False
-    
-    # Common shell commands that should run directly
-    if PLATFORM["name"] == "Windows":
-        shell_commands = [
-            "dir", "cls", "type", "copy", "move", "del", "md", "rd", 
-            "pwd", "ls", "cat", "clear", "whoami", "date", "time",
-            "ipconfig", "ping", "netstat", "nslookup", "tracert", "arp",
-            "tasklist", "taskkill", "systeminfo", "hostname", "ver",
-            "diskpart", "chkdsk", "format",
-            "tree", "fc", "comp", "more", "sort", "find", "findstr",
-            "attrib", "xcopy", "robocopy", "where", "set", "path",
-        ]
-        shell_starters = [
-            "cd ", "cd\\", "cd/", "dir ", "echo ", "type ", 
-            "copy ", "move ", "del ", "ren ", "rename ", "md ", "mkdir ",
-            "rd ", "rmdir ", "attrib ", "xcopy ", "robocopy ",
-            "Get-", "Set-", "New-", "Remove-", "Copy-", "Move-", "Out-",
-            "Write-", "Read-", "Start-", "Stop-", "Invoke-", "Test-",
-            "Select-", "Where-", "ForEach-", "Sort-", "Group-",
-            "git ", "npm ", "node ", "npx ", "yarn ", "pnpm ",
-            "python ", "python3 ", "py ", "pip ", "pip3 ",
-            "cargo ", "rustc ", "go ", "java ", "javac ",
-            "dotnet ", "nuget ",
-            "curl ", "wget ", "ssh ", "scp ", "docker ", "kubectl ",
-            "code ", "notepad ", "explorer ",
-            "./", ".\\", "/", "\\", "~", "$", ">", ">>", "|", "&&", ";",
-        ]
-    else:
-        shell_commands = [
-            "ls", "pwd", "clear", "whoami", "date", "cal", "uptime",
-            "top", "htop", "ps", "kill", "killall", "jobs", "bg", "fg",
-            "cat", "head", "tail", "less", "more", "touch", "stat",
-            "find", "grep", "awk", "sed", "wc", "sort", "uniq", "diff",
-            "tar", "zip", "unzip", "gzip", "gunzip", "bzip2",
-            "chmod", "chown", "chgrp", "id", "groups", "passwd",
-            "df", "du", "free", "mount", "umount", 
-            "ping", "curl", "wget", "ssh", "scp", "netstat", "ifconfig", "ip",
-            "apt", "yum", "dnf", "pacman", "brew", "snap", "flatpak",
-            "man", "which", "whereis", "history", "alias", "source", "export",
-        ]
-        shell_starters = [
-            "cd ", "ls ", "ll ", 
-            "cat ", "head ", "tail ", "touch ", "rm ", "cp ", "mv ",
-            "mkdir ", "rmdir ", "chmod ", "chown ", "ln ",
-            "echo ", "grep ", "sed ", "awk ", "cut ", "tr ", "xargs ",
-            "git ", "npm ", "node ", "npx ", "yarn ", "pnpm ",
-            "python ", "python3 ", "pip ", "pip3 ",
-            "cargo ", "rustc ", "go ", "java ", "javac ",
-            "make ", "cmake ", "gcc ", "g++ ", "clang ",
-            "brew ", "apt ", "apt-get ", "yum ", "dnf ", "pacman ", "snap ",
-            "sudo ", "su ", "ssh ", "scp ", "curl ", "wget ",
-            "docker ", "kubectl ", "aws ", "gcloud ", "az ",
-            "vi ", "vim ", "nano ", "emacs ", "code ",
-            "open ", "xdg-open ",
-            "export ", "source ", "alias ",
-            "./", "/", "~", "$", ">", ">>", "|", "&&", ";",
-        ]
-    
-    text_lower = text.lower()
-    if text_lower in [c.lower() for c in shell_commands]:
+
+    # Exit words and bare commands, then command-like prefixes
+    if text.lower() in _NOT_NATURAL_WORDS:
         return False
-    return not any(text.lower().startswith(s.lower()) for s in shell_starters)
+    return not _STARTER_RE.match(text)
+
+# Prefetched translation of the line being typed: (query, cwd, Future)
+_speculation = None
+SPECULATE_IDLE = 0.8  # seconds without a keystroke before prefetching
+SPECULATE_POLL = 0.1  # seconds between looks at the line buffer
+MAX_SPECULATIONS = 2  # prefetches per prompt, to spare the free-tier rate limits
+
+def _speculative_command(query: str, cwd: str) -> str:
+    """get_command for a prefetch: no rate-limit retries and no messages."""
+    _api_quiet.active = True
+    try:
+        return get_command(query, cwd)
+    finally:
+        _api_quiet.active = False
+
+def _maybe_speculate(buffer: str, cwd: str, state: dict):
+    """Start translating the input line in the background once typing pauses.
+
+    Only one prefetch is in flight at a time, and at most MAX_SPECULATIONS
+    are made per prompt.
+    """
+    global _speculation
+    now = time.monotonic()
+    if buffer != state["last"]:
+        state["last"], state["changed_at"] = buffer, now
+        return
+    if (not buffer or now - state["changed_at"] < SPECULATE_IDLE
+            or state["count"] >= MAX_SPECULATIONS
+            or (_speculation is not None and (_speculation[0] == buffer or not _speculation[2].done()))
+            or not is_natural_language(buffer) or is_multi_step(buffer)
+            or (cwd, buffer) in _recent_commands):
+        return
+    state["count"] += 1
+    _speculation = (buffer, cwd, get_executor().submit(_speculative_command, buffer, cwd))
+
+def read_input(prompt: str, cwd: str) -> str:
+    """Read a line, prefetching its AI translation while the user types.
+
+    The line buffer is sampled from a SIGALRM handler rather than another
+    thread: Python runs the handler on the main thread when readline's input
+    wait is interrupted, between keystrokes, so the buffer is never read while
+    readline is editing it.
+    """
+    if readline is None or IS_WINDOWS:
+        return input(prompt)
+    state = {"last": "", "changed_at": time.monotonic(), "count": 0}
+
+    def on_tick(signum, frame):
+        _maybe_speculate(readline.get_line_buffer().strip(), cwd, state)
+
+    previous = signal.signal(signal.SIGALRM, on_tick)
+    signal.setitimer(signal.ITIMER_REAL, SPECULATE_POLL, SPECULATE_POLL)
+    try:
+        return input(prompt)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+def take_speculation(query: str, cwd: str):
+    """Return the prefetched Future if it was made for this exact query, else None."""
+    global _speculation
+    speculation, _speculation = _speculation, None
+    if speculation and speculation[0] == query and speculation[1] == cwd:
+        return speculation[2]
+    return None
+
+def speculation_result(future):
+    """The prefetched command, or None if the prefetch failed (e.g. rate limited)."""
+    try:
+        return future.result()
+    except Exception:
+        return None
+
+# Long-lived PowerShell used by run_command on Windows: (Popen, line queue)
+_ps_worker = None
+_ps_lock = threading.Lock()  # held while a command is running in the worker
+PS_TIMEOUT = 60
+
+def _pump_lines(pipe, name: str, lines):
+    """Forward each line of a worker pipe to the shared queue, then None at EOF."""
+    for line in pipe:
+        lines.put((name, line))
+    lines.put((name, None))
+
+def _get_powershell():
+    """Return the PowerShell worker, starting a new one if it is not running."""
+    global _ps_worker
+    if _ps_worker is None or _ps_worker[0].poll() is not None:
+        import queue
+        process = subprocess.Popen(
+            ["powershell", "-NoLogo", "-NoProfile", "-NonInteractive", "-Command", "-"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            bufsize=1
+        )
+        lines = queue.Queue()
+        for name, pipe in (("out", process.stdout), ("err", process.stderr)):
+            threading.Thread(target=_pump_lines, args=(pipe, name, lines), daemon=True).start()
+        process.stdin.write("[Console]::OutputEncoding = [Text.Encoding]::UTF8\n")
+        _ps_worker = (process, lines)
+    return _ps_worker
+
+def _run_powershell_once(cmd: str, stream: bool = False) -> tuple:
+    """Run a command in a one-off PowerShell process, for when the worker is unusable."""
+    process = subprocess.Popen(
+        ["powershell", "-NoProfile", "-Command", cmd],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding='utf-8',
+        errors='replace',
+        cwd=_cwd
+    )
+    try:
+        stdout, stderr = process.communicate(timeout=PS_TIMEOUT)
+        returncode = process.returncode
+    except subprocess.TimeoutExpired:
+        process.kill()
+        stdout, stderr, returncode = "", "Command timed out", 1
+    if stream:
+        sys.stdout.write(stdout)
+        sys.stderr.write(stderr)
+        return stdout[:HISTORY_OUTPUT_CHARS], stderr[:HISTORY_OUTPUT_CHARS], returncode
+    return stdout, stderr, returncode
+
+def run_powershell(cmd: str, stream: bool = False) -> tuple:
+    """Run a command in the persistent PowerShell worker and return (stdout, stderr, returncode).
+
+    With `stream`, output is written to the terminal as it arrives and only the
+    first HISTORY_OUTPUT_CHARS of each stream are returned. The worker runs one
+    command at a time; a caller that finds it busy gets a one-off process.
+    """
+    if not _ps_lock.acquire(blocking=False):
+        return _run_powershell_once(cmd, stream)
+    try:
+        return _run_in_powershell_worker(cmd, stream)
+    finally:
+        _ps_lock.release()
+
+def _run_in_powershell_worker(cmd: str, stream: bool) -> tuple:
+    global _ps_worker
+    import base64
+    import queue
+    # The worker keeps its own location, so sync it with ours first. The script
+    # is sent base64-encoded so quoting, multi-line input and non-ASCII paths
+    # survive PowerShell's stdin parser. A fresh sentinel per command means
+    # output that happens to contain an old marker cannot end it early. The
+    # stdout sentinel carries the command's status: 0 if $? was true, else 1.
+    cwd = _cwd.replace("'", "''")
+    script = f"Set-Location -LiteralPath '{cwd}'\n{cmd}"
+    encoded = base64.b64encode(script.encode('utf-8')).decode('ascii')
+    sentinel = f"<<OPSH_EOF_{uuid.uuid4().hex}>>"
+    try:
+        process, lines = _get_powershell()
+        process.stdin.write(
+            f"Invoke-Expression ([Text.Encoding]::UTF8.GetString([Convert]::FromBase64String('{encoded}')))\n"
+            f"$opshStatus = if ($?) {{ 0 }} else {{ 1 }}; "
+            f"[Console]::Out.WriteLine('{sentinel}' + $opshStatus); [Console]::Error.WriteLine('{sentinel}')\n"
+        )
+        process.stdin.flush()
+    except OSError:
+        # The worker died before taking the command; run it the old way
+        _ps_worker = None
+        return _run_powershell_once(cmd, stream)
+
+    output = {"out": [], "err": []}
+    heads = {"out": "", "err": ""}
+    pending = {"out", "err"}
+    returncode = 1  # until the stdout sentinel reports otherwise
+    deadline = time.monotonic() + PS_TIMEOUT
+    while pending:
+        try:
+            name, line = lines.get(timeout=max(0.0, deadline - time.monotonic()))
+        except queue.Empty:
+            process.kill()
+            _ps_worker = None
+            if stream:
+                print("Command timed out", file=sys.stderr)
+                return heads["out"], "Command timed out", 1
+            return "".join(output["out"]), "Command timed out", 1
+        if line is None:
+            pending.discard(name)
+        elif line.startswith(sentinel):
+            pending.discard(name)
+            if name == "out":
+                returncode = int(line[len(sentinel):].strip() or 1)
+        elif stream:
+            sink = sys.stdout if name == "out" else sys.stderr
+            sink.write(line)
+            sink.flush()
+            if len(heads[name]) < HISTORY_OUTPUT_CHARS:
+                heads[name] += line[:HISTORY_OUTPUT_CHARS - len(heads[name])]
+        else:
+            output[name].append(line)
+    if stream:
+        return heads["out"], heads["err"], returncode
+    return "".join(output["out"]), "".join(output["err"]), returncode
+
+# Anything that needs /bin/sh to interpret it: operators, globs, expansions,
+# quoting escapes, comments, assignments and multi-line scripts
+_NEEDS_SHELL = re.compile(r'[|&;<>*?`$(){}\[\]~=#!\\\n]')
+
+def _spawn(cmd: str, **kwargs) -> subprocess.Popen:
+    """Start a Unix command, exec'ing simple ones directly instead of via /bin/sh."""
+    if not _NEEDS_SHELL.search(cmd):
+        try:
+            argv = shlex.split(cmd)
+            if argv:
+                return subprocess.Popen(argv, **kwargs)
+        except (ValueError, OSError):
+            # Unbalanced quotes, a shell builtin like export/alias (ENOENT),
+            # a script without a shebang (ENOEXEC) or one without +x (EACCES):
+            # let the shell run it and report any real error itself
+            pass
+    return subprocess.Popen(cmd, shell=True, **kwargs)
 
 def run_command(cmd: str) -> tuple:
     """Run a command and return (stdout, stderr)."""
     try:
-        if PLATFORM["name"] == "Windows":
-            # Use Popen for better output handling on Windows
-            process = subprocess.Popen(
-                ["powershell", "-NoProfile", "-Command", cmd],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                encoding='utf-8',
-                errors='replace'
-            )
-            stdout, stderr = process.communicate(timeout=60)
-            return stdout, stderr
+        if IS_WINDOWS:
+            return run_powershell(cmd)[:2]
         else:
-            result = subprocess.run(cmd, shell=True, capture_output=True, text=True)
-            return result.stdout, result.stderr
-    except subprocess.TimeoutExpired:
-        process.kill()
-        return "", "Command timed out"
+            process = _spawn(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            return process.communicate()
     except Exception as e:
         return "", str(e)
 
+def _tee_pipe(pipe, sink, heads: dict, name: str):
+    """Copy a child's pipe to `sink` as data arrives, keeping its head in `heads`."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    for data in iter(lambda: pipe.read1(8192), b""):
+        text = decoder.decode(data)
+        sink.write(text)
+        sink.flush()
+        if len(heads[name]) < HISTORY_OUTPUT_CHARS:
+            heads[name] += text[:HISTORY_OUTPUT_CHARS - len(heads[name])]
+    pipe.close()
+
+def run_command_stream(cmd: str) -> tuple:
+    """Run a command with its output passed straight through to the terminal.
+
+    Returns (stdout, stderr, returncode), the output cut to HISTORY_OUTPUT_CHARS
+    for the history.
+    """
+    try:
+        if IS_WINDOWS:
+            return run_powershell(cmd, stream=True)
+        process = _spawn(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except Exception as e:
+        print(e, file=sys.stderr)
+        return "", str(e), 1
+    heads = {"out": "", "err": ""}
+    tees = [
+        threading.Thread(target=_tee_pipe, args=(pipe, sink, heads, name), daemon=True)
+        for pipe, sink, name in ((process.stdout, sys.stdout, "out"), (process.stderr, sys.stderr, "err"))
+    ]
+    try:
+        for tee in tees:
+            tee.start()
+        for tee in tees:
+            tee.join()
+        return heads["out"], heads["err"], process.wait()
+    except BaseException:
+        # Ctrl+C (InterruptedError from exit_handler) or anything else:
+        # don't leave the child running behind the prompt
+        process.kill()
+        process.wait()
+        raise
+
+# Read-only network tools that are safe to run side by side when chained with ;
+# (&& chains stay sequential, since each step only runs if the last succeeded)
+_PARALLEL_SAFE = frozenset({"curl", "ping", "nslookup", "dig", "host"})
+_CHAIN_RE = re.compile(r"\s*;\s*")
+# The only curl options allowed in a parallel chain: anything else might write
+# a file (-o, -c, -D, --trace), change the request (-X, -d) or read options
+# from elsewhere (-K). Option -> whether it takes a value.
+_CURL_READ_ONLY_SHORT = {"s": False, "S": False, "L": False, "I": False, "i": False,
+                         "v": False, "f": False, "k": False, "4": False, "6": False,
+                         "H": True, "A": True, "e": True, "m": True}
+_CURL_READ_ONLY_LONG = {"--silent": False, "--show-error": False, "--location": False,
+                        "--head": False, "--include": False, "--verbose": False,
+                        "--fail": False, "--insecure": False, "--compressed": False,
+                        "--ipv4": False, "--ipv6": False, "--header": True,
+                        "--user-agent": True, "--referer": True, "--max-time": True,
+                        "--connect-timeout": True}
+PARALLEL_TIMEOUT = 60
+
+def _is_read_only_curl(args: list) -> bool:
+    """Whether curl's `args` use only options in the read-only allowlist."""
+    args = iter(args)
+    for arg in args:
+        if arg.startswith("--"):
+            takes_value = _CURL_READ_ONLY_LONG.get(arg)
+            if takes_value is None:
+                return False
+            if takes_value:
+                next(args, None)
+        elif arg.startswith("-"):
+            if len(arg) < 2:
+                return False
+            for i, flag in enumerate(arg[1:], 1):
+                takes_value = _CURL_READ_ONLY_SHORT.get(flag)
+                if takes_value is None:
+                    return False
+                if takes_value:
+                    if i == len(arg) - 1:
+                        next(args, None)
+                    break  # The rest of the argument is the value
+    return True
+
+def _is_parallel_safe(part: str) -> bool:
+    """Whether `part` is a plain, side-effect-free call to a safelisted tool."""
+    if not part or _NEEDS_SHELL.search(part):
+        return False
+    try:
+        argv = shlex.split(part)
+    except ValueError:
+        return False
+    tool = argv[0].lower() if argv else ""
+    if tool not in _PARALLEL_SAFE:
+        return False
+    if tool == "curl" and not _is_read_only_curl(argv[1:]):
+        return False
+    if tool == "ping" and not IS_WINDOWS and not any(a.startswith(("-c", "-w")) for a in argv[1:]):
+        return False  # would run until the timeout with its output held back
+    return True
+
+def parallel_parts(cmd: str):
+    """Split `a; b; c` into its commands if every one is parallel-safe, else None."""
+    parts = _CHAIN_RE.split(cmd.strip())
+    if len(parts) < 2 or not all(_is_parallel_safe(part) for part in parts):
+        return None
+    return parts
+
+def _run_with_timeout(cmd: str) -> tuple:
+    """run_command with a PARALLEL_TIMEOUT limit (the PowerShell worker has its own)."""
+    if IS_WINDOWS:
+        return run_command(cmd)
+    try:
+        process = _spawn(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    except OSError as e:
+        return "", f"{e}\n"
+    try:
+        return process.communicate(timeout=PARALLEL_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        stdout, stderr = process.communicate()
+        return stdout, stderr + "Command timed out\n"
+
+def run_parallel(parts: list) -> tuple:
+    """Run independent commands concurrently, then print their output in order.
+
+    Returns (stdout, stderr) cut to HISTORY_OUTPUT_CHARS, like run_command_stream.
+    """
+    results = list(get_executor().map(_run_with_timeout, parts))
+    for stdout, stderr in results:
+        sys.stdout.write(stdout)
+        sys.stdout.flush()
+        sys.stderr.write(stderr)
+    stdout = "".join(out for out, _ in results)
+    stderr = "".join(err for _, err in results)
+    return stdout[:HISTORY_OUTPUT_CHARS], stderr[:HISTORY_OUTPUT_CHARS]
+
+def command_streamer():
+    """Return (on_text, state) that echo a command while the AI streams it.
+
+    The first non-blank text replaces the thinking indicator with the "→ "
+    arrow; state["shown"] becomes True once anything has been printed.
+    """
+    state = {"shown": False}
+
+    def on_text(text: str):
+        if not state["shown"]:
+            text = text.lstrip()
+            if not text:
+                return
+            print(_CLEAR, end="\r")  # Clear the thinking message
+            print(f"{YELLOW}→ ", end="")
+            state["shown"] = True
+        print(text, end="", flush=True)
+
+    return on_text, state
+
+def execute_ai_command(command: str) -> bool:
+    """Auto-execute an AI-generated command and record it in the history.
+
+    Returns whether it succeeded (the cd worked, or the exit status was 0).
+    """
+    if not command.strip():
+        return False
+    # Handle directory change commands specially (they need to be run in Python, not subprocess)
+    cd_path = None
+    if command.lower().startswith("cd "):
+        cd_path = command[3:].strip()
+    elif command.lower().startswith("set-location "):
+        cd_path = command[13:].strip()
+    elif command.lower().startswith("chdir "):
+        cd_path = command[6:].strip()
+
+    if cd_path:
+        # Remove quotes if present
+        cd_path = cd_path.strip('"').strip("'")
+        path = _normalize_cd(cd_path)
+        try:
+            change_directory(path)
+        except Exception as e:
+            print(f"cd: {e}")
+            return False
+        return True
+    stdout, stderr, returncode = run_command_stream(command)
+    add_to_history(command, stdout + stderr)
+    return returncode == 0
+
+def handle_auth():
+    invalidate_config_cache()
+    auth_result = setup_authentication()
+    if auth_result:
+        print(f"{GREEN}✓ Authentication updated!{RESET}\n")
+
+def handle_uninstall():
+    confirm = input(f"{YELLOW}Remove OpenSH? [y/N]{RESET} ")
+    if confirm.lower() == "y":
+        import shutil
+        install_dir = Path.home() / ".opsh"
+        if IS_WINDOWS:
+            bin_path = Path.home() / ".opsh" / "opsh.cmd"
+        else:
+            bin_path = Path.home() / ".local" / "bin" / "opsh"
+        if install_dir.exists():
+            shutil.rmtree(install_dir)
+        if bin_path.exists():
+            os.remove(bin_path)
+        print(f"{GREEN}✓ OpenSH uninstalled{RESET}")
+        sys.exit(0)
+
+def handle_clearcache():
+    clear_command_cache()
+    print(f"{GREEN}✓ Command cache cleared{RESET}\n")
+
+# Built-in REPL commands, dispatched with a single dict lookup
+COMMAND_HANDLERS = {
+    "!auth": handle_auth,
+    "!version": show_version,
+    "!uninstall": handle_uninstall,
+    "!help": show_help,
+    "!credits": show_credits,
+    "!clearcache": handle_clearcache,
+}
+
 def main():
     # Parse arguments
     parser = argparse.ArgumentParser(
@@ -507,7 +1561,8 @@ def main():
     parser.add_argument(
         '-c', '--command',
         nargs='*',
-        help='Run a single natural language query and exit'
+        action='append',
+        help='Run a natural language query and exit (repeat to run several)'
     )
     parser.add_argument(
         '-v', '--version',
@@ -515,171 +1570,142 @@ def main():
         version=f'OpenSH v{__version__}'
     )
     args = parser.parse_args()
-    
+    queries = [' '.join(words) for words in args.command or [] if words]
+
+    # Interactive sessions check for updates in the background, overlapping the
+    # network request with config loading (and any first-run auth prompts)
+    update_check = None
+    if not queries:
+        update_check = threading.Thread(target=check_for_updates, daemon=True)
+        update_check.start()
+
     # Check if first run (no auth configured)
     config = load_config()
-    
+
     if not config.get("provider"):
         # First run - show welcome and auth setup
-        print("\n\033[1m🚀 Welcome to OpenSH!\033[0m")
+        print(f"\n{BOLD}🚀 Welcome to OpenSH!{RESET}")
         print("Talk to your terminal in plain English.\n")
         
         auth_result = setup_authentication()
         if not auth_result:
-            print("\033[31mAuthentication required to use OpenSH.\033[0m")
+            print(f"{RED}Authentication required to use OpenSH.{RESET}")
             sys.exit(1)
-    
-    # Handle single command mode (-c flag)
-    if args.command:
-        query = ' '.join(args.command)
-        cwd = os.getcwd()
+
+    # Handle single command mode (-c flag, may be repeated)
+    if queries:
+        cwd = _cwd
         try:
-            print("\033[90m⏳ thinking...\033[0m", end="\r", flush=True)
-            command = get_command(query, cwd)
-            print(" " * 20, end="\r")
-            print(f"\033[33m→ {command}\033[0m")
-            # Auto-execute
+            print(_THINKING, end="\r", flush=True)
+            commands = get_commands(queries, cwd)
+            print(_CLEAR, end="\r")
+        except Exception as e:
+            print(f"{RED}Error: {e}{RESET}")
+            return
+        for command in commands:
+            if not command.strip():
+                continue
+            print(f"{YELLOW}→ {command}{RESET}")
+            # Auto-execute, stopping at the first failure since later
+            # commands (e.g. after a cd) may depend on it
             if command.startswith("cd "):
-                path = os.path.expanduser(command[3:].strip())
-                if PLATFORM["name"] == "Windows":
-                    path = path.replace("/", "\\")
+                path = _normalize_cd(command[3:].strip())
                 try:
-                    os.chdir(path)
+                    change_directory(path)
                     print(f"Changed to: {path}")
                 except Exception as e:
                     print(f"cd: {e}")
-            else:
-                stdout, stderr = run_command(command)
-                if stdout:
-                    print(stdout)
-                if stderr:
-                    print(stderr)
-        except Exception as e:
-            print(f"\033[31mError: {e}\033[0m")
+                    sys.exit(1)
+            elif run_command_stream(command)[2] != 0:
+                sys.exit(1)
         return
-    
-    # Check for updates (silent, non-blocking)
-    check_for_updates()
-    
-    print("\033[1mOpenSH\033[0m ready! Type naturally or use !help\n")
-    
+
+    _ensure_readline()
+    print(f"{BOLD}OpenSH{RESET} ready! Type naturally or use !help\n")
+    # Give a fast update check a moment so its notice can precede the first prompt
+    update_check.join(timeout=0.05)
+
     while True:
         try:
-            cwd = os.getcwd()
-            # Show full path like default Windows terminal
-            prompt = f"\033[32m{cwd}\033[0m > "
-            user_input = input(prompt).strip()
+            show_update_notice()
+            # Connect to the AI provider while the user types
+            provider = load_config().get("provider")
+            get_executor().submit(prewarm_connection, API_HOSTS.get(provider, API_HOSTS["groq"]))
+            cwd = _cwd
+            user_input = read_input(_prompt, cwd).strip()
+            speculative = take_speculation(user_input, cwd)
             
             if not user_input:
                 continue
             
             # Exit commands
-            if user_input.lower() in ["exit", "quit", "bye", "goodbye"]:
+            if user_input.lower() in EXIT_WORDS:
                 show_goodbye()
                 break
             
             # Handle cd command specially
             if user_input.startswith("cd "):
-                path = os.path.expanduser(user_input[3:].strip())
-                if PLATFORM["name"] == "Windows":
-                    path = path.replace("/", "\\")
+                path = _normalize_cd(user_input[3:].strip())
                 try:
-                    os.chdir(path)
+                    change_directory(path)
                 except Exception as e:
                     print(f"cd: {e}")
                 continue
             elif user_input == "cd":
-                os.chdir(Path.home())
+                change_directory(Path.home())
                 continue
             
-            if user_input == "!auth":
-                auth_result = setup_authentication()
-                if auth_result:
-                    print("\033[32m✓ Authentication updated!\033[0m\n")
-                continue
-            
-            if user_input == "!version":
-                show_version()
-                continue
-            
-            if user_input == "!uninstall":
-                confirm = input("\033[33mRemove OpenSH? [y/N]\033[0m ")
-                if confirm.lower() == "y":
-                    import shutil
-                    install_dir = Path.home() / ".opsh"
-                    if PLATFORM["name"] == "Windows":
-                        bin_path = Path.home() / ".opsh" / "opsh.cmd"
-                    else:
-                        bin_path = Path.home() / ".local" / "bin" / "opsh"
-                    if install_dir.exists():
-                        shutil.rmtree(install_dir)
-                    if bin_path.exists():
-                        os.remove(bin_path)
-                    print("\033[32m✓ OpenSH uninstalled\033[0m")
-                    sys.exit(0)
-                continue
-            
-            if user_input == "!help":
-                show_help()
-                continue
-            
-            if user_input == "!credits":
-                show_credits()
+            handler = COMMAND_HANDLERS.get(user_input)
+            if handler:
+                handler()
                 continue
             
             if user_input.startswith("!"):
                 cmd = user_input[1:]
                 if not cmd:
                     continue
-                stdout, stderr = run_command(cmd)
-                print(stdout, end="")
-                if stderr:
-                    print(stderr, end="")
+                parts = parallel_parts(cmd)
+                if parts:
+                    stdout, stderr = run_parallel(parts)
+                else:
+                    stdout, stderr, _ = run_command_stream(cmd)
                 add_to_history(cmd, stdout + stderr)
                 continue
             
             if not is_natural_language(user_input):
-                stdout, stderr = run_command(user_input)
-                print(stdout, end="")
-                if stderr:
-                    print(stderr, end="")
+                stdout, stderr, _ = run_command_stream(user_input)
                 add_to_history(user_input, stdout + stderr)
                 continue
             # Show thinking indicator
-            print("\033[90m⏳ thinking...\033[0m", end="\r", flush=True)
-            command = get_command(user_input, cwd)
-            print(" " * 20, end="\r")  # Clear the thinking message
-            print(f"\033[33m→ {command}\033[0m")
+            print(_THINKING, end="\r", flush=True)
             
-            # Auto-execute the command
-            # Handle directory change commands specially (they need to be run in Python, not subprocess)
-            cd_path = None
-            if command.lower().startswith("cd "):
-                cd_path = command[3:].strip()
-            elif command.lower().startswith("set-location "):
-                cd_path = command[13:].strip()
-            elif command.lower().startswith("chdir "):
-                cd_path = command[6:].strip()
+            if is_multi_step(user_input):
+                # One round-trip for the whole plan, then run the steps in order
+                commands = get_commands_batch(user_input, cwd)
+                print(_CLEAR, end="\r")
+                for i, command in enumerate(commands):
+                    print(f"{YELLOW}→ {command}{RESET}")
+                    if not execute_ai_command(command):
+                        # Later steps assume this one worked (e.g. its cd), so stop
+                        if i + 1 < len(commands):
+                            print(f"{RED}Step failed - skipped the remaining {len(commands) - i - 1} step(s){RESET}")
+                        break
+                continue
             
-            if cd_path:
-                # Remove quotes if present
-                cd_path = cd_path.strip('"').strip("'")
-                path = os.path.expanduser(cd_path)
-                # Expand environment variables like $env:USERPROFILE
-                if PLATFORM["name"] == "Windows":
-                    path = path.replace("/", "\\")
-                    path = os.path.expandvars(path.replace("$env:", "%").replace("%USERPROFILE", "%USERPROFILE%"))
-                try:
-                    os.chdir(path)
-                except Exception as e:
-                    print(f"cd: {e}")
+            on_text, streamed = command_streamer()
+            command = recall_command(user_input, cwd)
+            if command is None:
+                command = speculation_result(speculative) if speculative else None
+                if command is None:
+                    command = get_command(user_input, cwd, on_text)
+                remember_command(user_input, cwd, command)
+            if streamed["shown"]:
+                print(RESET)
             else:
-                stdout, stderr = run_command(command)
-                if stdout:
-                    print(stdout)
-                if stderr:
-                    print(stderr)
-                add_to_history(command, stdout + stderr)
+                print(_CLEAR, end="\r")  # Clear the thinking message
+                print(f"{YELLOW}→ {command}{RESET}")
+            
+            execute_ai_command(command)
             
         except (EOFError, KeyboardInterrupt):
             show_goodbye()
@@ -689,12 +1715,12 @@ def main():
         except Exception as e:
             err = str(e)
             if "429" in err or "quota" in err.lower() or "rate" in err.lower():
-                print("\033[31mRate limit hit - waiting 5 seconds...\033[0m")
+                print(f"{RED}Rate limit hit - waiting 5 seconds...{RESET}")
                 time.sleep(5)
             elif "API_KEY" in err or "api_key" in err or "authentication" in err.lower():
-                print("\033[31mAuth error - run !auth to update your credentials\033[0m")
+                print(f"{RED}Auth error - run !auth to update your credentials{RESET}")
             elif "InterruptedError" not in err and "KeyboardInterrupt" not in err:
-                print(f"\033[31mError: {err[:100]}\033[0m")
+                print(f"{RED}Error: {err[:100]}{RESET}")
 
 if __name__ == "__main__":
     main()